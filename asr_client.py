@@ -0,0 +1,68 @@
+"""GUI side of the recognizer: starts asr_worker.py and reads its messages.
+
+Kept apart from the worker so the GUI process never imports sounddevice.
+The message protocol is described in asr_worker.py.
+"""
+import os
+import queue
+import subprocess
+import sys
+import threading
+from jsonutil import json_loads
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asr_worker.py")
+
+# ---- CPU AFFINITY ----
+def allowed_cpus():
+    # affinity control is Linux only
+    if not hasattr(os, "sched_setaffinity"):
+        return []
+    return sorted(os.sched_getaffinity(0))
+
+def leave_cpu():
+    # Tk and the translation threads take every core but the worker's (the
+    # last one). The mask is per thread, so move the ones already running as
+    # well; threads started later inherit it from the main thread. Best
+    # effort: a thread may exit first, or a container may refuse the call
+    cpus = allowed_cpus()
+    if len(cpus) < 2:
+        return
+    try:
+        tids = os.listdir("/proc/self/task")
+    except OSError:
+        tids = [0]   # no /proc: just the calling thread
+    for tid in tids:
+        try:
+            os.sched_setaffinity(int(tid), cpus[:-1])
+        except OSError:
+            pass
+
+# ---- WORKER ----
+def spawn(blocksize, partial_interval=0.0, latency="high"):
+    # a reader thread moves the worker's messages into a queue the GUI
+    # drains from Tk's own thread
+    proc = subprocess.Popen([sys.executable, WORKER_PATH,
+                             "--blocksize", str(blocksize),
+                             "--partial-interval", str(partial_interval),
+                             "--latency", str(latency)],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            encoding="utf-8", bufsize=1)
+    # after Popen, so the worker still starts with every core to choose from
+    leave_cpu()
+    results = queue.SimpleQueue()
+
+    def read_results():
+        for line in proc.stdout:
+            results.put(json_loads(line))
+        results.put({"error": "Speech recognizer exited."})
+
+    threading.Thread(target=read_results, daemon=True).start()
+    return proc, results
+
+def send(proc, command):
+    try:
+        proc.stdin.write(command + "\n")
+        proc.stdin.flush()
+        return True
+    except (OSError, ValueError):
+        return False
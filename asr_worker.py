@@ -0,0 +1,145 @@
+"""Out-of-process Vosk recognizer, started by asr_client.spawn().
+
+Reads "start" / "stop" commands on stdin and writes one JSON message per line
+on stdout: {"ready": true}, {"text": ...}, {"partial": ...}, {"error": ...},
+{"info": ...} for diagnostics, or {"dropped": n}, the number of input
+overflows since the last report.
+The GUI never decodes audio itself, so Tk keeps its interpreter to itself.
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+import sounddevice as sd
+from asr_client import allowed_cpus
+from jsonutil import json_dumps, json_loads
+from vosk_shared import SAMPLE_RATE, VOSK_MODEL_PATH, get_recognizer
+
+# ---- CONFIG ----
+USE_GPU = os.getenv("VOSK_GPU")
+
+# partials are a single-key object; a regex is cheaper than a JSON parse on
+# the most frequent path
+RE_PARTIAL = re.compile(r'"partial"\s*:\s*"([^"]*)"')
+
+stop_flag = threading.Event()
+_out_lock = threading.Lock()
+
+# ---- OUTPUT ----
+def emit(message):
+    # raw UTF-8 bytes, independent of the console's encoding
+    line = json_dumps(message) + b"\n"
+    with _out_lock:
+        sys.stdout.buffer.write(line)
+        sys.stdout.buffer.flush()
+
+# ---- RECOGNIZER ----
+def pin_cpu():
+    # give decoding a core of its own: the last one we may run on; the GUI
+    # moves off it in asr_client.leave_cpu
+    cpus = allowed_cpus()
+    if len(cpus) > 1:
+        os.sched_setaffinity(0, {cpus[-1]})
+
+def make_recognizer():
+    if USE_GPU:
+        from vosk import BatchModel, BatchRecognizer, GpuInit
+        GpuInit()
+        model = BatchModel(VOSK_MODEL_PATH)
+        return model, BatchRecognizer(model, SAMPLE_RATE)
+    return None, get_recognizer()
+
+# ---- LISTEN ----
+def listen_loop(args, batch_model, rec):
+    # blocking reads, no callback: none of our code runs on PortAudio's
+    # realtime thread, and when decoding falls behind the host buffer
+    # overflows (and reports it) instead of a queue of stale audio growing
+    overflows = 0
+    last_partial = 0.0
+    last_partial_raw = ""
+    last_report = time.monotonic()
+    try:
+        with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=args.blocksize, dtype='int16',
+                               channels=1, latency=args.latency) as stream:
+            emit({"info": f"Audio input: {args.blocksize / SAMPLE_RATE * 1000:.0f} ms blocks, "
+                          f"{stream.latency * 1000:.0f} ms device latency"})
+            while not stop_flag.is_set():
+                data, overflowed = stream.read(args.blocksize)
+                data = bytes(data)  # the one copy: vosk's cffi binding wants bytes, not a buffer
+                overflows += overflowed
+                if overflows and time.monotonic() - last_report >= 1.0:
+                    emit({"dropped": overflows})
+                    overflows = 0
+                    last_report = time.monotonic()
+                if batch_model is not None:
+                    # BatchRecognizer has no partials; results appear after Wait()
+                    rec.AcceptWaveform(data)
+                    batch_model.Wait()
+                    result = rec.Result()
+                    if result:
+                        emit_final(json_loads(result))
+                elif rec.AcceptWaveform(data):
+                    emit_final(json_loads(rec.Result()))
+                elif args.partial_interval and time.monotonic() - last_partial >= args.partial_interval:
+                    raw = rec.PartialResult()
+                    if raw == last_partial_raw:
+                        continue  # silence or a held word: nothing new to parse or send
+                    last_partial_raw = raw
+                    match = RE_PARTIAL.search(raw)
+                    partial = match.group(1) if match else ""
+                    if partial and not partial.isspace():
+                        last_partial = time.monotonic()
+                        emit({"partial": partial})
+    except Exception as e:
+        emit({"error": str(e)})
+
+def emit_final(result):
+    text = result.get("text", "").strip()
+    if text:
+        emit({"text": text})
+
+# ---- MAIN ----
+def latency_arg(value):
+    # sounddevice takes "low", "high" or a latency in seconds
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Vosk recognizer worker")
+    parser.add_argument("--blocksize", type=int, default=8000)
+    parser.add_argument("--partial-interval", type=float, default=0.0,
+                        help="emit partial results at most this often, in seconds (0 disables)")
+    parser.add_argument("--latency", type=latency_arg, default="high",
+                        help='input latency: "low", "high" or seconds')
+    args = parser.parse_args()
+
+    pin_cpu()
+    try:
+        batch_model, rec = make_recognizer()
+    except Exception as e:
+        emit({"error": f"Could not load Vosk model: {e}"})
+        return
+    emit({"ready": True})
+
+    listener = None
+    for line in sys.stdin:
+        command = line.strip()
+        if command == "start":
+            if listener is not None:
+                # a stopped listener exits after its current block
+                stop_flag.set()
+                listener.join()
+            stop_flag.clear()
+            listener = threading.Thread(target=listen_loop, args=(args, batch_model, rec), daemon=True)
+            listener.start()
+        elif command == "stop":
+            stop_flag.set()
+    # stdin closed: the GUI has exited
+    stop_flag.set()
+
+if __name__ == "__main__":
+    main()
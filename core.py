@@ -0,0 +1,405 @@
+"""Shared core of the translator GUIs.
+
+translate_google.py, translate_realtime.py and streaming_realtime.py only
+decide what to do with a recognized sentence. The recognizer worker, the
+transcript, the translation cache and every window live here, once.
+"""
+import tkinter as tk
+from tkinter.scrolledtext import ScrolledText
+from tkinter import filedialog, messagebox
+import hashlib
+import io
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+import asr_client
+
+# ---- CONFIG ----
+BLOCKSIZE = 3200         # 200 ms of audio per read
+LATENCY = "low"          # PortAudio input latency: "low", "high" or seconds
+CACHE_SIZE = 4096
+POLL_MS = 50
+FLUSH_MS = 100           # widget updates are batched into one insert per window per tick
+DISPLAY_MAX = 200        # messages replayed into a newly opened window
+SCROLLBACK_LINES = 2000  # widgets drop their oldest quarter past this
+REEMIT_WINDOW = 0.5      # seconds; the same final again this soon is Vosk repeating itself
+# translation caches live in the user's cache directory, not the working directory
+CACHE_DIR = os.path.join(os.getenv("LOCALAPPDATA") or os.getenv("XDG_CACHE_HOME")
+                         or os.path.expanduser("~/.cache"), "hoyu-translation")
+
+TARGET_LANGS = {
+    "en": "English",
+    "tl": "Tagalog",
+    "id": "Indonesian",
+    "th": "Thai",
+    "vi": "Vietnamese"
+}
+
+# ---- STATE ----
+# full transcript per language, written incrementally so saving needs no join;
+# recent_messages keeps just enough to refill a window that is reopened
+text_buffers = {lang: io.StringIO() for lang in ["zh"] + list(TARGET_LANGS.keys())}
+recent_messages = {lang: deque(maxlen=DISPLAY_MAX) for lang in text_buffers}
+# messages not yet drawn; only ever touched on the Tk thread, _flush draws them
+pending = {lang: deque() for lang in text_buffers}
+pending_partial = {}
+log_queue = queue.SimpleQueue()
+PUNCT_TBL = str.maketrans("", "", "，。！？、,.!? \u3000")
+_last_final = ("", 0.0)   # normalized text, time.monotonic()
+
+# set by run()
+worker = results = None
+root = None
+_closing = False   # set by shutdown(); translations that land after it are dropped
+_handle_result = _on_start = _on_close = None
+_transcript_header = ""
+
+# ---- RECORD ----
+def recognize_and_translate():
+    start_btn.config(state=tk.DISABLED)
+    stop_btn.config(state=tk.NORMAL)
+    if _on_start:
+        _on_start()
+    asr_client.send(worker, "start")
+    log_message("🎙 Listening... Speak Chinese now.\n")
+
+def stop_listening():
+    asr_client.send(worker, "stop")
+    start_btn.config(state=tk.NORMAL)
+    stop_btn.config(state=tk.DISABLED)
+    log_message("🛑 Stopped listening.\n")
+    save_cache()
+
+def shutdown():
+    global _closing
+    _closing = True
+    asr_client.send(worker, "stop")
+    save_cache()
+    if _on_close:
+        _on_close()
+    root.destroy()
+
+def poll_results():
+    while True:
+        try:
+            message = results.get_nowait()
+        except queue.Empty:
+            break
+        _handle_result(message)
+    root.after(POLL_MS, poll_results)
+
+def handle_status(message):
+    # everything the worker sends besides text and partials
+    if "dropped" in message:
+        log_message(f"⚠️ Recognizer is falling behind; audio overflowed {message['dropped']} times.\n")
+    elif "info" in message:
+        log_message(f"🎚 {message['info']}\n")
+    elif "ready" in message:
+        log_message("✅ Speech recognizer loaded.\n")
+    elif "error" in message:
+        log_message(f"⚠️ {message['error']}\n")
+
+def is_duplicate(text):
+    # Vosk sometimes re-emits a final right away. Only a final equal to the
+    # previous one (punctuation and spacing aside) and within REEMIT_WINDOW
+    # counts; a speaker saying "好" again is a new sentence
+    global _last_final
+    normalized = text.translate(PUNCT_TBL)
+    now = time.monotonic()
+    previous, at = _last_final
+    _last_final = normalized, now
+    return normalized == previous and now - at < REEMIT_WINDOW
+
+# ---- TRANSLATION CACHE ----
+# LRU of finished translations keyed by (text digest, target); recurring
+# phrases skip the network entirely and the cache survives restarts
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_path = None
+
+def cache_key(text, lang_code):
+    # Vosk separates words with spaces; "你好 世界" and "你好世界" share an entry
+    normalized = "".join(text.split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest(), lang_code
+
+def cache_get(text, lang_code):
+    key = cache_key(text, lang_code)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
+
+def cache_put(text, lang_code, translated):
+    with _cache_lock:
+        _cache[cache_key(text, lang_code)] = translated
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def load_cache(filename):
+    # each backend keeps its own file in CACHE_DIR; save_cache writes back to it
+    global _cache_path
+    _cache_path = os.path.join(CACHE_DIR, filename)
+    try:
+        with open(_cache_path, "rb") as f:
+            loaded = pickle.load(f)
+    except Exception:
+        # missing, truncated, or written by something else: start empty
+        return
+    if not isinstance(loaded, dict):
+        return
+    with _cache_lock:
+        _cache.update(loaded)
+        # CACHE_SIZE may have shrunk since the file was written
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def save_cache():
+    with _cache_lock:
+        snapshot = OrderedDict(_cache)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_cache_path, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        log_message(f"⚠️ Could not save translation cache: {e}\n")
+
+# ---- TEXT HANDLING ----
+def after_idle(func, *args):
+    # callable from any thread; does nothing once the window is going away
+    if _closing:
+        return
+    try:
+        root.after_idle(func, *args)
+    except (RuntimeError, tk.TclError):
+        pass  # root was destroyed between the check and the call
+
+def update_text(lang_code, message, transient=False):
+    # callable from any thread; the work itself happens on the Tk thread
+    after_idle(draw_text, lang_code, message, transient)
+
+def draw_text(lang_code, message, transient=False):
+    # Tk thread only
+    if transient:
+        # only the newest partial matters
+        pending_partial[lang_code] = message
+    else:
+        text_buffers[lang_code].write(message)
+        text_buffers[lang_code].write("\n\n")
+        recent_messages[lang_code].append(message)
+        pending[lang_code].append(message)
+
+def clear_partials():
+    # Tk thread only; a final ends its utterance, so the partials go now
+    # rather than whenever (or if ever) the final's translations arrive
+    for lang_code in text_buffers:
+        pending_partial.pop(lang_code, None)
+        entry = open_windows.get(lang_code)
+        if not entry:
+            continue
+        win = entry["text"]
+        try:
+            shown = win.tag_ranges("partial")
+            if shown:
+                win.configure(state="normal")
+                win.delete(shown[0], shown[-1])
+                win.configure(state="disabled")
+        except tk.TclError:
+            open_windows.pop(lang_code, None)
+
+def log_message(msg):
+    # callable from any thread; _flush writes the log out on the Tk thread
+    log_queue.put(msg)
+
+def _trim(widget):
+    # the full transcript lives in text_buffers; the widgets only need the
+    # tail, and a Text that grows all session gets slower with every insert
+    if int(widget.index("end-1c").split(".")[0]) > SCROLLBACK_LINES:
+        widget.delete("1.0", f"{SCROLLBACK_LINES // 4}.0")
+
+def _append(widget, text):
+    # text widgets stay read-only outside of our own inserts
+    widget.configure(state="normal")
+    widget.insert(tk.END, text)
+    _trim(widget)
+    widget.configure(state="disabled")
+    widget.see(tk.END)
+
+def _flush():
+    lines = []
+    while not log_queue.empty():
+        lines.append(log_queue.get())
+    if lines:
+        _append(main_log, "".join(lines))
+    batch = {lang: pending[lang] for lang in pending if pending[lang]}
+    for lang in batch:
+        pending[lang] = deque()
+    partials = pending_partial.copy()
+    pending_partial.clear()
+
+    for lang_code in batch.keys() | partials.keys():
+        entry = open_windows.get(lang_code)
+        if not entry:
+            continue
+        win = entry["text"]
+        try:
+            if not win.winfo_exists():
+                raise tk.TclError("window destroyed")
+            win.configure(state="normal")
+            shown = win.tag_ranges("partial")
+            if shown and lang_code in partials:
+                # a newer partial replaces the one on screen
+                win.delete(shown[0], shown[-1])
+                shown = ()
+            if lang_code in batch:
+                # a partial still showing belongs to a later utterance; finals go above it
+                win.insert(shown[0] if shown else tk.END, "\n\n".join(batch[lang_code]) + "\n\n")
+            if lang_code in partials:
+                win.insert(tk.END, f"{partials[lang_code]}\n\n", "partial")
+            _trim(win)
+            win.configure(state="disabled")
+            win.see(tk.END)
+        except tk.TclError:
+            # destroyed without going through close_window; the text stays in text_buffers
+            open_windows.pop(lang_code, None)
+    root.after(FLUSH_MS, _flush)
+
+# ---- SAVE TRANSCRIPT ----
+def save_transcript():
+    if not any(buf.tell() for buf in text_buffers.values()):
+        messagebox.showinfo("No Content", "There's no text to save yet.")
+        return
+    path = filedialog.asksaveasfilename(defaultextension=".txt",
+                                        filetypes=[("Text Files", "*.txt")],
+                                        title="Save Transcript As")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{_transcript_header}\n\n")
+            f.write(text_buffers["zh"].getvalue())
+            for code, name in TARGET_LANGS.items():
+                f.write(f"\n🌐 {name} Translation:\n")
+                f.write(text_buffers[code].getvalue())
+        messagebox.showinfo("Saved", f"Transcript saved:\n{path}")
+
+# ---- POPUP WINDOWS ----
+open_windows = {}
+
+def toggle_window(lang_code, title):
+    if lang_code in open_windows:
+        open_windows[lang_code]["window"].destroy()
+        del open_windows[lang_code]
+        log_message(f"❌ Closed {title} window.\n")
+        return
+
+    win = tk.Toplevel(root)
+    win.title(title)
+    win.geometry("600x400+200+200")
+    win.configure(bg="#f4f4f4")
+
+    label = tk.Label(win, text=title, font=("Arial", 16, "bold"), bg="#f4f4f4")
+    label.pack(pady=5)
+
+    # append-only view: keep Tk from recording an undo history for every insert
+    text_area = ScrolledText(win, wrap=tk.WORD, font=("Arial", 18), bg="#ffffff",
+                             undo=False, autoseparators=False, maxundo=0, state="disabled")
+    text_area.pack(fill="both", expand=True, padx=10, pady=10)
+
+    # the replay below already covers anything still pending
+    recent = recent_messages[lang_code]
+    pending[lang_code].clear()
+    pending_partial.pop(lang_code, None)
+    if recent:
+        _append(text_area, "\n\n".join(recent) + "\n\n")
+
+    pres_mode = tk.BooleanVar(value=False)
+    def toggle_presentation():
+        if not pres_mode.get():
+            win.attributes('-fullscreen', True)
+            text_area.config(font=("Arial", 36), bg="black", fg="white")
+            label.config(bg="black", fg="white")
+            pres_mode.set(True)
+        else:
+            win.attributes('-fullscreen', False)
+            text_area.config(font=("Arial", 18), bg="white", fg="black")
+            label.config(bg="#f4f4f4", fg="black")
+            pres_mode.set(False)
+
+    tk.Button(win, text="🖥 Presentation Mode", font=("Arial", 12),
+              bg="#333", fg="white", command=toggle_presentation).pack(pady=5)
+
+    open_windows[lang_code] = {"window": win, "text": text_area}
+    win.protocol("WM_DELETE_WINDOW", lambda: close_window(lang_code, title))
+    log_message(f"🪟 Opened {title} window.\n")
+
+def close_window(lang_code, title):
+    if lang_code in open_windows:
+        open_windows[lang_code]["window"].destroy()
+        del open_windows[lang_code]
+        log_message(f"❌ Closed {title} window.\n")
+
+# ---- MAIN WINDOW ----
+def run(title, geometry, handle_result, cache_file, partial_interval=0.0,
+        on_start=None, on_close=None, on_ready=None,
+        transcript_header="🈶 Chinese Transcript:"):
+    # handle_result gets every worker message on the Tk thread; on_start and
+    # on_close run when listening starts and before the window goes away;
+    # on_ready runs once the window is built, for startup probes
+    global worker, results, root, main_log, start_btn, stop_btn
+    global _handle_result, _on_start, _on_close, _transcript_header
+    _handle_result, _on_start, _on_close = handle_result, on_start, on_close
+    _transcript_header = transcript_header
+
+    # decoding runs in its own process (asr_worker.py); results arrive on a queue
+    worker, results = asr_client.spawn(BLOCKSIZE, partial_interval, LATENCY)
+
+    root = tk.Tk()
+    root.title(title)
+    root.geometry(geometry)
+    root.protocol("WM_DELETE_WINDOW", shutdown)
+
+    frame = tk.Frame(root, bg="#f4f4f4")
+    frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    main_log = ScrolledText(frame, wrap=tk.WORD, font=("Consolas", 11), height=15,
+                            undo=False, autoseparators=False, maxundo=0, state="disabled")
+    main_log.pack(fill="both", expand=True, padx=10, pady=10)
+
+    btn_frame = tk.Frame(root, bg="#f4f4f4")
+    btn_frame.pack(pady=10)
+
+    start_btn = tk.Button(btn_frame, text="🎧 Start Listening", font=("Arial", 13, "bold"),
+                          bg="#4CAF50", fg="white", relief="raised", command=recognize_and_translate)
+    start_btn.pack(side=tk.LEFT, padx=10)
+
+    stop_btn = tk.Button(btn_frame, text="⏹ Stop", font=("Arial", 13, "bold"),
+                         bg="#f44336", fg="white", relief="raised",
+                         state=tk.DISABLED, command=stop_listening)
+    stop_btn.pack(side=tk.LEFT, padx=10)
+
+    save_btn = tk.Button(btn_frame, text="💾 Save Transcript", font=("Arial", 13, "bold"),
+                         bg="#2196F3", fg="white", relief="raised",
+                         command=save_transcript)
+    save_btn.pack(side=tk.LEFT, padx=10)
+
+    lang_frame = tk.LabelFrame(root, text="🌐 Open / Close Language Windows",
+                               font=("Arial", 12, "bold"), bg="#f4f4f4")
+    lang_frame.pack(fill="x", padx=10, pady=10)
+
+    tk.Button(lang_frame, text="🈶 Chinese", font=("Arial", 12),
+              bg="#E0E0E0", relief="raised",
+              command=lambda: toggle_window("zh", "Chinese (Recognized)")).pack(fill="x", padx=10, pady=3)
+
+    for code, name in TARGET_LANGS.items():
+        tk.Button(lang_frame, text=f"🌐 {name}", font=("Arial", 12),
+                  bg="#E0E0E0", relief="raised",
+                  command=lambda c=code, n=name: toggle_window(c, n)).pack(fill="x", padx=10, pady=3)
+
+    load_cache(cache_file)
+    if on_ready:
+        root.after_idle(on_ready)
+    root.after(POLL_MS, poll_results)
+    root.after(FLUSH_MS, _flush)
+    root.mainloop()
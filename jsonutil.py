@@ -0,0 +1,11 @@
+"""orjson when it is installed, the standard library otherwise.
+
+json_dumps returns UTF-8 bytes either way, as orjson does.
+"""
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:
+    import json
+    json_loads = json.loads
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
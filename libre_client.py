@@ -0,0 +1,207 @@
+"""LibreTranslate backend shared by translate_realtime.py and streaming_realtime.py.
+
+Every request runs on one asyncio loop thread over a pooled client. When
+NLLB_MODEL points at a CTranslate2 model, translation happens in-process
+through nllb_local instead. Results go to the windows via core.update_text.
+"""
+import asyncio
+import os
+import importlib.util
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from jsonutil import json_dumps, json_loads
+from core import TARGET_LANGS, cache_get, cache_key, cache_put, log_message, update_text
+
+# ---- CONFIG ----
+LIBRE_URL = "http://localhost:5000/translate"
+LIBRE_LANGUAGES_URL = LIBRE_URL.replace("/translate", "/languages")
+MAX_IN_FLIGHT = 8   # concurrent LibreTranslate requests
+DETECT = False      # the speaker is always Chinese; never ask the server to auto-detect
+SOURCE_LANG = "auto" if DETECT else "zh"
+NLLB_MODEL = os.getenv("NLLB_MODEL", "")   # CTranslate2 NLLB-200 dir; translates in-process instead of LibreTranslate
+CACHE_FILE = "translation_cache_nllb.pkl" if NLLB_MODEL else "translation_cache_libre.pkl"
+
+# ---- CLIENT ----
+# every request runs on one asyncio loop thread over a pooled client
+# (HTTP/2 when the h2 package is installed, keep-alive HTTP/1.1 otherwise)
+loop = asyncio.new_event_loop()
+threading.Thread(target=loop.run_forever, daemon=True).start()
+# a full sentence must fit in one round, or the last targets wait for a free slot
+_pool_size = max(MAX_IN_FLIGHT, len(TARGET_LANGS))
+client = httpx.AsyncClient(http2=importlib.util.find_spec("h2") is not None,
+                           limits=httpx.Limits(max_keepalive_connections=_pool_size,
+                                               max_connections=_pool_size),
+                           headers={"Content-Type": "application/json"},
+                           timeout=10.0)
+# request bodies per target, built once; only "q" changes per call
+_PAYLOAD_TEMPLATES = {code: {"source": SOURCE_LANG, "target": code, "format": "text",
+                             "alternatives": 0}
+                      for code in TARGET_LANGS}
+_request_slots = asyncio.Semaphore(_pool_size)
+# per-target batching state, only touched on the loop thread
+_queued = {lang: [] for lang in TARGET_LANGS}
+_sending = set()
+_senders = set()   # the loop only keeps weak references to its tasks
+_inflight = {}   # cache key -> future of a sentence already queued or sent
+if NLLB_MODEL:
+    import nllb_local   # optional: needs ctranslate2 and sentencepiece
+    # one batch at a time; CTranslate2 already spreads a batch over its own threads
+    EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
+# ---- TRANSLATION ----
+def translate_text(text):
+    asyncio.run_coroutine_threadsafe(_translate_task(text), loop)
+
+async def _translate_task(text):
+    if NLLB_MODEL:
+        await _translate_local(text)
+        return
+    # all targets at once: wall-clock is the slowest language, not the sum
+    await asyncio.gather(*(_translate_one(text, lc) for lc in TARGET_LANGS))
+
+async def _translate_local(text):
+    translations = {}
+    misses = []
+    for lang_code in TARGET_LANGS:
+        hit = cache_get(text, lang_code)
+        if hit is None:
+            misses.append(lang_code)
+        else:
+            translations[lang_code] = hit
+    if misses:
+        try:
+            # CPU-bound and GIL-free inside CTranslate2: keep it off the event loop
+            fresh = await loop.run_in_executor(EXECUTOR, nllb_local.translate_all,
+                                                   NLLB_MODEL, text, misses)
+        except Exception as e:
+            fresh = {lc: f"⚠️ {e}" for lc in misses}
+        else:
+            for lang_code, translated in fresh.items():
+                cache_put(text, lang_code, translated)
+        translations.update(fresh)
+    for lang_code in TARGET_LANGS:
+        update_text(lang_code, translations[lang_code])
+
+async def _translate_one(text, lang_code):
+    try:
+        update_text(lang_code, await _cached_translate(text, lang_code))
+    except httpx.HTTPStatusError as e:
+        update_text(lang_code, f"❌ Error ({e.response.status_code})")
+    except Exception as e:
+        update_text(lang_code, f"⚠️ {e}")
+
+async def _cached_translate(text, lang_code):
+    translated = cache_get(text, lang_code)
+    if translated is None:
+        translated = await _translate_remote(text, lang_code)
+        cache_put(text, lang_code, translated)
+    return translated
+
+async def _translate_remote(text, lang_code):
+    # the same sentence twice in a row shares one request per target
+    key = cache_key(text, lang_code)
+    future = _inflight.get(key)
+    if future is None:
+        future = _inflight[key] = loop.create_future()
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+        _queued[lang_code].append((text, future))
+        if lang_code not in _sending:
+            _sending.add(lang_code)
+            task = loop.create_task(_send_batches(lang_code))
+            _senders.add(task)
+            task.add_done_callback(_senders.discard)
+    return await future
+
+async def _send_batches(lang_code):
+    # /translate takes one target but a list of texts, so sentences for a
+    # target that arrive while its request is out go together in the next one
+    try:
+        while _queued[lang_code]:
+            batch, _queued[lang_code] = _queued[lang_code], []
+            try:
+                translated = await _post_batch([text for text, _ in batch], lang_code)
+                if len(translated) != len(batch):
+                    # can't tell which text a short answer belongs to
+                    raise ValueError(f"LibreTranslate returned {len(translated)} translations "
+                                     f"for {len(batch)} texts")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, translated):
+                    future.set_result(result)
+    finally:
+        _sending.discard(lang_code)
+
+async def _post_batch(texts, lang_code):
+    payload = {**_PAYLOAD_TEMPLATES[lang_code], "q": texts if len(texts) > 1 else texts[0]}
+    async with _request_slots:
+        response = await client.post(LIBRE_URL, content=json_dumps(payload))
+    response.raise_for_status()
+    body = json_loads(response.content)
+    try:
+        translated = body["translatedText"]
+    except KeyError:
+        # a 200 without a translation carries the server's reason instead
+        raise ValueError(body.get("error", "LibreTranslate sent no translation")) from None
+    return translated if isinstance(translated, list) else [translated]
+
+# ---- STARTUP / SHUTDOWN ----
+def warm_up():
+    # off the Tk thread; the outcome shows up in the log
+    if NLLB_MODEL:
+        log_message(f"🧠 Translating in-process with {NLLB_MODEL}.\n")
+        # load the model now rather than on the first sentence
+        EXECUTOR.submit(nllb_local.load, NLLB_MODEL).add_done_callback(_report_model_load)
+    else:
+        asyncio.run_coroutine_threadsafe(_probe_server(), loop).add_done_callback(_report_probe)
+
+async def _probe_server():
+    # runs once at startup, so the first sentence finds an open connection;
+    # also reports targets the server can't produce from SOURCE_LANG
+    response = await client.get(LIBRE_LANGUAGES_URL)
+    response.raise_for_status()
+    languages = {lang["code"]: lang for lang in json_loads(response.content)}
+    # older servers don't list "targets"; assume everything is reachable
+    targets = languages.get(SOURCE_LANG, {}).get("targets", TARGET_LANGS)
+    unsupported = [code for code in TARGET_LANGS if code not in targets]
+    # a server that still detects the language reports "detectedLanguage"
+    payload = {**_PAYLOAD_TEMPLATES["en"], "q": "你好"}
+    async with _request_slots:
+        response = await client.post(LIBRE_URL, content=json_dumps(payload))
+    response.raise_for_status()
+    return "detectedLanguage" not in json_loads(response.content), unsupported
+
+def _report_probe(future):
+    # done-callback on the loop thread; log_message is thread-safe
+    try:
+        locked, unsupported = future.result()
+    except Exception as e:
+        log_message(f"⚠️ LibreTranslate not reachable: {e}\n")
+        return
+    log_message("✅ Translator warmed.\n")
+    if unsupported:
+        log_message(f"⚠️ LibreTranslate has no '{SOURCE_LANG}' → {', '.join(unsupported)} model.\n")
+    if locked:
+        log_message(f"✅ LibreTranslate source locked to '{SOURCE_LANG}'.\n")
+    else:
+        log_message("⚠️ LibreTranslate is auto-detecting the source language.\n")
+
+def _report_model_load(future):
+    try:
+        future.result()
+    except Exception as e:
+        log_message(f"⚠️ Could not load {NLLB_MODEL}: {e}\n")
+    else:
+        log_message("✅ Translator warmed.\n")
+
+def close():
+    if NLLB_MODEL:
+        # queued sentences would otherwise all run before the process exits
+        EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    # let the loop thread close its sockets; don't hang the exit on it
+    try:
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(timeout=1)
+    except Exception:
+        pass
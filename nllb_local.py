@@ -0,0 +1,39 @@
+"""In-process NLLB-200 translation with CTranslate2.
+
+The LibreTranslate scripts use this instead of HTTP when NLLB_MODEL points at
+a converted model directory (ct2-transformers-converter --quantization int8),
+which must also contain NLLB's sentencepiece.bpe.model.
+"""
+import os
+from functools import lru_cache
+import ctranslate2
+import sentencepiece
+
+# ---- CONFIG ----
+SOURCE_TAG = "zho_Hans"
+LANG_TAGS = {
+    "en": "eng_Latn",
+    "tl": "tgl_Latn",
+    "id": "ind_Latn",
+    "th": "tha_Thai",
+    "vi": "vie_Latn"
+}
+
+# ---- MODEL ----
+@lru_cache(maxsize=1)
+def load(model_path):
+    translator = ctranslate2.Translator(model_path, device="cpu", compute_type="int8")
+    tokenizer = sentencepiece.SentencePieceProcessor(
+        model_file=os.path.join(model_path, "sentencepiece.bpe.model"))
+    return translator, tokenizer
+
+# ---- TRANSLATION ----
+def translate_all(model_path, text, lang_codes):
+    # one batch: the same source once per target, each steered by its language tag
+    translator, tokenizer = load(model_path)
+    source = [SOURCE_TAG] + tokenizer.encode(text, out_type=str) + ["</s>"]
+    results = translator.translate_batch([source] * len(lang_codes),
+                                         target_prefix=[[LANG_TAGS[lc]] for lc in lang_codes])
+    # every hypothesis starts with the forced target tag
+    return {lc: tokenizer.decode(result.hypotheses[0][1:])
+            for lc, result in zip(lang_codes, results)}
@@ -1,205 +1,174 @@
-import tkinter as tk
-from tkinter.scrolledtext import ScrolledText
-from tkinter import filedialog, messagebox
-import json
-import sounddevice as sd
+import functools
 import queue
-from vosk import Model, KaldiRecognizer
 import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import types
+import requests
+from requests.adapters import HTTPAdapter
+import deep_translator.constants
+import deep_translator.google
 from deep_translator import GoogleTranslator
+import core
+from core import TARGET_LANGS, cache_get, cache_key, cache_put, log_message, update_text
 
 # ---- CONFIG ----
-VOSK_MODEL_PATH = "vosk-model-cn-0.22"
-
-TARGET_LANGS = {
-    "en": "English",
-    "tl": "Tagalog",
-    "id": "Indonesian",
-    "th": "Thai",
-    "vi": "Vietnamese"
-}
-
-# ---- INIT AUDIO + VOSK ----
-model = Model(VOSK_MODEL_PATH)
-rec = KaldiRecognizer(model, 16000)
-q = queue.Queue()
-stop_flag = threading.Event()
-text_buffers = {lang: "" for lang in ["zh"] + list(TARGET_LANGS.keys())}
-
-def audio_callback(indata, frames, time, status):
-    q.put(bytes(indata))
-
-# ---- RECORD + TRANSLATE ----
-def recognize_and_translate():
-    start_btn.config(state=tk.DISABLED)
-    stop_btn.config(state=tk.NORMAL)
-    stop_flag.clear()
-    log_message("🎙 Listening... Speak Chinese now.\n")
-    threading.Thread(target=listen_loop, daemon=True).start()
-
-def stop_listening():
-    stop_flag.set()
-    start_btn.config(state=tk.NORMAL)
-    stop_btn.config(state=tk.DISABLED)
-    log_message("🛑 Stopped listening.\n")
-
-def listen_loop():
-    with sd.RawInputStream(samplerate=16000, blocksize=4000, dtype='int16',
-                           channels=1, callback=audio_callback):
-        while not stop_flag.is_set():
-            data = q.get()
-            if rec.AcceptWaveform(data):
-                # full sentence
-                result = json.loads(rec.Result())
-                text = result.get("text", "").strip()
-                if text:
-                    update_text("zh", f"{text}")
-                    translate_text(text)
-            else:
-                # partial (streaming)
-                partial_result = json.loads(rec.PartialResult())
-                partial = partial_result.get("partial", "").strip()
-                if partial:
-                    update_text("zh", f"🕒 {partial}", transient=True)
+CACHE_FILE = "translation_cache_google.pkl"
+PARTIAL_INTERVAL = 0.1   # cap partial-result redraws at ~10 Hz
+PARTIAL_TRANSLATE_INTERVAL = 0.5   # translate the growing partial at most this often
+REQUEST_TIMEOUT = 10     # seconds; deep_translator sets none of its own
+
+# partial translation: one slot, so a newer partial replaces a stale one;
+# _utterance counts finals so translations of an earlier partial are dropped
+_partial_jobs = queue.Queue(maxsize=1)
+_utterance = 0
+_last_partial_job = 0.0
+
+# deep_translator calls the module-level requests.get(); point it at one
+# keep-alive session so every target reuses the same connection pool
+session = requests.Session()
+# one pooled socket per concurrent caller: the executor workers plus the partial thread
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=len(TARGET_LANGS) + 1,
+                                      max_retries=0))
+session.headers["Connection"] = "keep-alive"
+deep_translator.google.requests = types.SimpleNamespace(**vars(requests))
+# without a timeout one stalled request holds its language's lock for good
+deep_translator.google.requests.get = functools.partial(session.get, timeout=REQUEST_TIMEOUT)
+
+# one translator per target, reused across sentences; the lock guards the
+# instance's request params when two sentences hit the same language at once
+EXECUTOR = ThreadPoolExecutor(max_workers=len(TARGET_LANGS))
+_translators = {code: GoogleTranslator(source='zh-TW', target=code) for code in TARGET_LANGS}
+_translator_locks = {code: threading.Lock() for code in TARGET_LANGS}
+# the partial thread has translators of its own, so a partial in flight
+# never holds a lock a final is waiting for
+_partial_translators = {code: GoogleTranslator(source='zh-TW', target=code) for code in TARGET_LANGS}
+# cache key -> future of a translation already running; a repeat waits on it
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# ---- RESULTS ----
+def handle_result(message):
+    global _utterance
+    if "text" in message:
+        # full sentence
+        text = message["text"]
+        _utterance += 1
+        # queued behind any partial draw still pending, so nothing stale survives it
+        core.after_idle(core.clear_partials)
+        if core.is_duplicate(text):
+            # left out of every window, so the transcripts stay line for line
+            log_message(f"(duplicate, skipped) {text}\n")
+        else:
+            update_text("zh", f"{text}")
+            translate_text(text)
+    elif "partial" in message:
+        # partial (streaming)
+        update_text("zh", f"🕒 {message['partial']}", transient=True)
+        translate_partial(message["partial"])
+    else:
+        core.handle_status(message)
 
 # ---- GOOGLE TRANSLATION ----
 def translate_text(text):
-    threading.Thread(target=_translate_task, args=(text,), daemon=True).start()
-
-def _translate_task(text):
-    for lang_code in TARGET_LANGS.keys():
-        try:
-            translated = GoogleTranslator(source='zh-TW', target=lang_code).translate(text)
-            update_text(lang_code, translated)
-        except Exception as e:
-            update_text(lang_code, f"⚠️ {e}")
-
-# ---- TEXT HANDLING ----
-def update_text(lang_code, message, transient=False):
-    if not transient:
-        text_buffers[lang_code] += f"{message}\n\n"
-
-    if lang_code in open_windows:
-        win = open_windows[lang_code]["text"]
-        if transient:
-            # replace last transient line
-            win.delete("end-3l", "end-1l")
-        win.insert(tk.END, f"{message}\n\n")
-        win.see(tk.END)
-
-# ---- SAVE TRANSCRIPT ----
-def save_transcript():
-    combined = ["🈶 Chinese Transcript:\n", text_buffers["zh"].strip() + "\n\n"]
-    for code, name in TARGET_LANGS.items():
-        combined.append(f"🌐 {name} Translation:\n{text_buffers[code].strip()}\n\n")
-    content = "\n".join(combined).strip()
-    if not content:
-        messagebox.showinfo("No Content", "There's no text to save yet.")
-        return
-    path = filedialog.asksaveasfilename(defaultextension=".txt",
-                                        filetypes=[("Text Files", "*.txt")],
-                                        title="Save Transcript As")
-    if path:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
-        messagebox.showinfo("Saved", f"Transcript saved:\n{path}")
-
-# ---- POPUP WINDOWS ----
-open_windows = {}
-
-def toggle_window(lang_code, title):
-    if lang_code in open_windows:
-        open_windows[lang_code]["window"].destroy()
-        del open_windows[lang_code]
-        log_message(f"❌ Closed {title} window.\n")
-        return
-
-    win = tk.Toplevel(root)
-    win.title(title)
-    win.geometry("600x400+200+200")
-    win.configure(bg="#f4f4f4")
-
-    label = tk.Label(win, text=title, font=("Arial", 16, "bold"), bg="#f4f4f4")
-    label.pack(pady=5)
-
-    text_area = ScrolledText(win, wrap=tk.WORD, font=("Arial", 18), bg="#ffffff")
-    text_area.pack(fill="both", expand=True, padx=10, pady=10)
-
-    if lang_code in text_buffers:
-        text_area.insert(tk.END, text_buffers[lang_code])
-        text_area.see(tk.END)
-
-    pres_mode = tk.BooleanVar(value=False)
-    def toggle_presentation():
-        if not pres_mode.get():
-            win.attributes('-fullscreen', True)
-            text_area.config(font=("Arial", 36), bg="black", fg="white")
-            label.config(bg="black", fg="white")
-            pres_mode.set(True)
+    # all targets in parallel: wall-clock is the slowest language, not the sum
+    for lang_code in TARGET_LANGS:
+        cached = cache_get(text, lang_code)
+        if cached is not None:
+            # repeated phrase: no request and no hop through the pool
+            update_text(lang_code, cached)
         else:
-            win.attributes('-fullscreen', False)
-            text_area.config(font=("Arial", 18), bg="white", fg="black")
-            label.config(bg="#f4f4f4", fg="black")
-            pres_mode.set(False)
-
-    tk.Button(win, text="🖥 Presentation Mode", font=("Arial", 12),
-              bg="#333", fg="white", command=toggle_presentation).pack(pady=5)
-
-    open_windows[lang_code] = {"window": win, "text": text_area}
-    win.protocol("WM_DELETE_WINDOW", lambda: close_window(lang_code, title))
-    log_message(f"🪟 Opened {title} window.\n")
-
-def close_window(lang_code, title):
-    if lang_code in open_windows:
-        open_windows[lang_code]["window"].destroy()
-        del open_windows[lang_code]
-        log_message(f"❌ Closed {title} window.\n")
+            EXECUTOR.submit(_translate_one, text, lang_code)
+
+def warm_up():
+    EXECUTOR.submit(_warm_up)
+
+def _warm_up():
+    # one throwaway request opens the pooled connection (TCP + TLS), so the
+    # first sentence doesn't pay for it
+    url = deep_translator.constants.BASE_URLS["GOOGLE_TRANSLATE"]
+    try:
+        session.get(url, timeout=5).raise_for_status()
+    except requests.RequestException as e:
+        log_message(f"⚠️ Google Translate not reachable: {e}\n")
+    else:
+        log_message("✅ Translator warmed.\n")
+
+def _translate_one(text, lang_code):
+    try:
+        update_text(lang_code, _cached_translate(text, lang_code))
+    except Exception as e:
+        update_text(lang_code, f"⚠️ {e}")
+
+def _cached_translate(text, lang_code):
+    translated = cache_get(text, lang_code)
+    if translated is None:
+        translated = _translate_remote(text, lang_code)
+        cache_put(text, lang_code, translated)
+    return translated
+
+def _translate_remote(text, lang_code):
+    key = cache_key(text, lang_code)
+    with _inflight_lock:
+        future = _inflight.get(key)
+        running = future is not None
+        if not running:
+            future = _inflight[key] = Future()
+    if running:
+        return future.result()
+    try:
+        with _translator_locks[lang_code]:
+            translated = _translators[lang_code].translate(text)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    future.set_result(translated)
+    return translated
+
+def translate_partial(text):
+    global _last_partial_job
+    now = time.monotonic()
+    if now - _last_partial_job < PARTIAL_TRANSLATE_INTERVAL:
+        return
+    _last_partial_job = now
+    try:
+        _partial_jobs.get_nowait()
+    except queue.Empty:
+        pass
+    _partial_jobs.put_nowait((_utterance, text))
+
+def _partial_loop():
+    # lower priority than finals: one thread, one language after another.
+    # Reads the cache but never fills it; throwaway prefixes would push out
+    # the recurring phrases it is there for.
+    while True:
+        utterance, text = _partial_jobs.get()
+        for lang_code in TARGET_LANGS:
+            if not _partial_jobs.empty():
+                break  # a newer partial is waiting
+            translated = cache_get(text, lang_code)
+            if translated is None:
+                try:
+                    translated = _partial_translators[lang_code].translate(text)
+                except Exception:
+                    continue  # best effort; the final reports errors
+            core.after_idle(_show_partial, utterance, lang_code, translated)
+
+def _show_partial(utterance, lang_code, translated):
+    if utterance == _utterance:
+        core.draw_text(lang_code, f"🕒 {translated}", transient=True)
+
+def close():
+    # drop queued sentences now: concurrent.futures' own exit hook would
+    # otherwise run every one of them before the process can exit
+    EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    session.close()
 
 # ---- MAIN WINDOW ----
-root = tk.Tk()
-root.title("🎧 Chinese → Multi-language Translator (Live Mode)")
-root.geometry("650x700")
-
-frame = tk.Frame(root, bg="#f4f4f4")
-frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-main_log = ScrolledText(frame, wrap=tk.WORD, font=("Consolas", 11), height=15)
-main_log.pack(fill="both", expand=True, padx=10, pady=10)
-
-btn_frame = tk.Frame(root, bg="#f4f4f4")
-btn_frame.pack(pady=10)
-
-start_btn = tk.Button(btn_frame, text="🎧 Start Listening", font=("Arial", 13, "bold"),
-                      bg="#4CAF50", fg="white", relief="raised", command=recognize_and_translate)
-start_btn.pack(side=tk.LEFT, padx=10)
-
-stop_btn = tk.Button(btn_frame, text="⏹ Stop", font=("Arial", 13, "bold"),
-                     bg="#f44336", fg="white", relief="raised",
-                     state=tk.DISABLED, command=stop_listening)
-stop_btn.pack(side=tk.LEFT, padx=10)
-
-save_btn = tk.Button(btn_frame, text="💾 Save Transcript", font=("Arial", 13, "bold"),
-                     bg="#2196F3", fg="white", relief="raised",
-                     command=save_transcript)
-save_btn.pack(side=tk.LEFT, padx=10)
-
-lang_frame = tk.LabelFrame(root, text="🌐 Open / Close Language Windows",
-                           font=("Arial", 12, "bold"), bg="#f4f4f4")
-lang_frame.pack(fill="x", padx=10, pady=10)
-
-tk.Button(lang_frame, text="🈶 Chinese", font=("Arial", 12),
-          bg="#E0E0E0", relief="raised",
-          command=lambda: toggle_window("zh", "Chinese (Recognized)")).pack(fill="x", padx=10, pady=3)
-
-for code, name in TARGET_LANGS.items():
-    tk.Button(lang_frame, text=f"🌐 {name}", font=("Arial", 12),
-              bg="#E0E0E0", relief="raised",
-              command=lambda c=code, n=name: toggle_window(c, n)).pack(fill="x", padx=10, pady=3)
-
-def log_message(msg):
-    main_log.insert(tk.END, msg)
-    main_log.see(tk.END)
-
 log_message("✅ Ready.\nThis version streams live speech and translates continuously.\n")
-
-root.mainloop()
+threading.Thread(target=_partial_loop, daemon=True).start()
+core.run("🎧 Chinese → Multi-language Translator (Live Mode)", "650x700", handle_result,
+         CACHE_FILE, partial_interval=PARTIAL_INTERVAL, on_close=close, on_ready=warm_up)
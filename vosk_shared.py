@@ -0,0 +1,22 @@
+import threading
+from vosk import Model, KaldiRecognizer
+
+# ---- CONFIG ----
+VOSK_MODEL_PATH = "vosk-model-cn-0.22"
+SAMPLE_RATE = 16000
+
+# ---- MODEL ----
+# the cn model is large and takes seconds to load; load it once per process,
+# even when two threads ask for it at the same time
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = Model(VOSK_MODEL_PATH)
+    return _model
+
+def get_recognizer():
+    return KaldiRecognizer(get_model(), SAMPLE_RATE)